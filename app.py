@@ -1,69 +1,251 @@
+import hashlib
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+
+import altair as alt
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+# Parse CSVs with PyArrow's multithreaded reader; set to False to fall back to pandas
+USE_ARROW_CSV = True
+
+MARKETING_FILES = {
+    "Facebook": "data/Facebook.csv",
+    "Google": "data/Google.csv",
+    "TikTok": "data/TikTok.csv"
+}
+BUSINESS_FILE = "data/Business.csv"
+
+# Prepared frames are persisted here so cold starts skip CSV parsing and aggregation
+CACHE_DIR = "cache"
+CACHED_FRAMES = ("all_marketing", "business", "combined", "daily_marketing")
+# Bump when prepare_data() output changes so stale caches are not reused
+CACHE_VERSION = 9
+
+# 32-bit numerics halve the memory traffic of every sum and ratio; keys are the raw CSV headers
+MARKETING_DTYPES = {"impression": "int32", "clicks": "int32", "spend": "float32", "attributed revenue": "float32"}
+
+# Additive volume columns rolled up by date, channel and campaign
+VOLUME_COLS = ["impression", "clicks", "spend", "attributed_revenue"]
+
+# Numba-compiled groupby sums run in parallel across cores but cost a few seconds of JIT compilation
+# per process, so they only pay off on large datasets; pandas' Cython path is used otherwise
+USE_NUMBA_GROUPBY = False
+GROUPBY_ENGINE = "numba" if USE_NUMBA_GROUPBY and importlib.util.find_spec("numba") else None
+GROUPBY_ENGINE_KWARGS = {"parallel": True, "nopython": True} if GROUPBY_ENGINE else None
+
+# Date ranges longer than this are plotted as weekly means to keep trend charts light
+TREND_RESAMPLE_DAYS = 180
+
+# Table display formats, applied through Styler so columns stay numeric underneath
+CAMPAIGN_TABLE_FORMAT = {"spend": "${:,.0f}", "attributed_revenue": "${:,.0f}", "campaign_roas": "{:.2f}"}
+CHANNEL_TABLE_FORMAT = {
+    "spend": "${:,.0f}", "attributed_revenue": "${:,.0f}",
+    "channel_roas": "{:.2f}", "channel_ctr": "{:.2%}", "channel_cpc": "${:.2f}"
+}
+
+# Only the marketing columns the dashboard reads are parsed; tactic and state are never materialized
+MARKETING_COLUMNS = ["date", "campaign", "impression", "clicks", "spend", "attributed revenue"]
+
+ARROW_COLUMN_TYPES = {
+    "date": pa.timestamp("ns"),
+    **{col: pa.from_numpy_dtype(np.dtype(dtype)) for col, dtype in MARKETING_DTYPES.items()}
+}
 
 # -------------------------
 # Data Loading & Preparation
 # -------------------------
 
 def clean_columns(df):
-    """Clean column names - remove spaces, lowercase, handle inconsistencies"""
-    return df.rename(columns=lambda x: x.strip().lower().replace(" ", "_"))
-
-@st.cache_data
-def load_data():
-    """Load and combine all marketing data with business metrics"""
+    """Clean column names in place - remove spaces, lowercase, handle inconsistencies"""
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_", regex=False)
+    return df
+
+def read_csv(filepath, columns=None):
+    """Read a CSV with `date` parsed and marketing numerics downcast"""
+    if USE_ARROW_CSV:
+        convert_options = pacsv.ConvertOptions(column_types=ARROW_COLUMN_TYPES, include_columns=columns or [])
+        return pacsv.read_csv(filepath, convert_options=convert_options).to_pandas()
+    return pd.read_csv(filepath, usecols=columns, parse_dates=["date"], dtype=MARKETING_DTYPES)
+
+def read_marketing_csvs(files):
+    """Scan all channel CSVs as one multithreaded Arrow dataset, tagging each row with its channel"""
+    channel_by_path = {path: channel for channel, path in files.items()}
+    convert_options = pacsv.ConvertOptions(column_types=ARROW_COLUMN_TYPES)
+    dataset = ds.dataset(list(files.values()), format=ds.CsvFileFormat(convert_options=convert_options))
+    
+    batches = []
+    for tagged in dataset.scanner(columns=MARKETING_COLUMNS, use_threads=True).scan_batches():
+        batch = tagged.record_batch
+        channel = pa.repeat(channel_by_path[tagged.fragment.path], batch.num_rows)
+        batches.append(batch.append_column("channel", channel))
     
-    # Load marketing data from all channels
-    files = {
-        "Facebook": "data/Facebook.csv",
-        "Google": "data/Google.csv", 
-        "TikTok": "data/TikTok.csv"
-    }
+    # One contiguous table converts straight to pandas, no pd.concat copy
+    return pa.Table.from_batches(batches).to_pandas(self_destruct=True)
+
+def safe_divide(numerator, denominator):
+    """Divide element-wise, returning NaN wherever the denominator is zero"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.full_like(numerator, np.nan), where=denominator != 0)
+
+def add_rate_metrics(df, prefix=""):
+    """Add CTR, CPC and ROAS columns in one pass over the underlying NumPy arrays"""
+    impression, clicks, spend, revenue = (
+        df[col].to_numpy(dtype=np.float64) for col in ("impression", "clicks", "spend", "attributed_revenue")
+    )
+    df[f"{prefix}ctr"] = safe_divide(clicks, impression)
+    df[f"{prefix}cpc"] = safe_divide(spend, clicks)
+    df[f"{prefix}roas"] = safe_divide(revenue, spend)
+    return df
+
+def sum_by_key(df, key, cols):
+    """Sum columns per key into int64/float64 with np.bincount over the key's factorized codes"""
+    codes, keys = pd.factorize(df[key], sort=True)
+    # Shift by one so missing keys (code -1) land in bin 0, which is dropped just as groupby drops them
+    bins = codes + 1
+    sums = {}
+    for col in cols:
+        totals = np.bincount(bins, weights=df[col].to_numpy(), minlength=len(keys) + 1)[1:]
+        sums[col] = totals.astype(np.int64) if np.issubdtype(df[col].dtype, np.integer) else totals
+    return pd.DataFrame({key: keys, **sums})
+
+def sum_by_sorted_date(df, cols):
+    """Sum columns per date for a date-sorted frame using np.add.reduceat over contiguous date runs"""
+    dates, starts = np.unique(df["date"].to_numpy(), return_index=True)
+    sums = {}
+    for col in cols:
+        values = df[col].to_numpy()
+        acc_dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64
+        sums[col] = np.add.reduceat(values, starts, dtype=acc_dtype)
+    return pd.DataFrame({"date": dates, **sums})
+
+def rollup(df, key):
+    """Sum the volume columns per key in int64/float64, using the numba groupby engine when enabled"""
+    if GROUPBY_ENGINE:
+        grouped = df.groupby(key, observed=True)[VOLUME_COLS]
+        return grouped.sum(engine=GROUPBY_ENGINE, engine_kwargs=GROUPBY_ENGINE_KWARGS).reset_index()
+    return sum_by_key(df, key, VOLUME_COLS)
+
+def date_slice(df, start_date, end_date):
+    """Rows of a date-sorted frame between start_date and end_date inclusive, located by binary search"""
+    dates = df["date"].to_numpy()
+    lo = dates.searchsorted(np.datetime64(start_date), side="left")
+    hi = dates.searchsorted(np.datetime64(end_date), side="right")
+    return df.iloc[lo:hi]
+
+def source_fingerprint(paths):
+    """Hash the cache version and the path, mtime and size of each source file"""
+    stats = [(p, os.path.getmtime(p), os.path.getsize(p)) for p in paths]
+    return hashlib.md5(str((CACHE_VERSION, stats)).encode()).hexdigest()
+
+def prepare_data():
+    """Load and combine all marketing data with business metrics"""
     
-    dfs = []
-    for channel, filepath in files.items():
-        temp = pd.read_csv(filepath)
-        temp = clean_columns(temp)
-        temp["channel"] = channel
-        dfs.append(temp)
+    # Load and combine marketing data from all channels
+    if USE_ARROW_CSV:
+        all_marketing = clean_columns(read_marketing_csvs(MARKETING_FILES))
+    else:
+        dfs = [clean_columns(read_csv(filepath, MARKETING_COLUMNS)) for filepath in MARKETING_FILES.values()]
+        # One np.concatenate per column avoids pd.concat's block merge and index rebuild
+        all_marketing = pd.DataFrame({
+            col: np.concatenate([df[col].to_numpy() for df in dfs]) for col in dfs[0].columns
+        })
+        channel_codes = np.repeat(np.arange(len(dfs), dtype=np.int8), [len(df) for df in dfs])
+        all_marketing["channel"] = pd.Categorical.from_codes(channel_codes, categories=list(MARKETING_FILES))
     
-    # Combine all marketing data
-    all_marketing = pd.concat(dfs, ignore_index=True)
+    # Categorical keys let groupbys and filters work on small integer codes instead of strings
+    all_marketing["channel"] = all_marketing["channel"].astype("category")
+    all_marketing["campaign"] = all_marketing["campaign"].astype("category")
     
-    # Calculate key marketing metrics
-    # Had to handle division by zero carefully
-    all_marketing["ctr"] = all_marketing["clicks"] / all_marketing["impression"].replace(0, np.nan)
-    all_marketing["cpc"] = all_marketing["spend"] / all_marketing["clicks"].replace(0, np.nan)
-    all_marketing["roas"] = all_marketing["attributed_revenue"] / all_marketing["spend"].replace(0, np.nan)
+    # Keep rows in date order so daily rollups and date filters work on contiguous runs
+    all_marketing = all_marketing.sort_values("date", kind="stable", ignore_index=True)
     
     # Load business data
-    business = pd.read_csv("data/Business.csv")
+    business = read_csv(BUSINESS_FILE)
     business = clean_columns(business)
+    business = business.sort_values("date", kind="stable", ignore_index=True)
     
     # Create daily marketing summary for joining with business data
-    daily_marketing = all_marketing.groupby("date").agg({
-        "impression": "sum",
-        "clicks": "sum", 
-        "spend": "sum",
-        "attributed_revenue": "sum"
-    }).reset_index()
+    daily_marketing = sum_by_sorted_date(all_marketing, VOLUME_COLS)
+    
+    # Calculate daily metrics - rates are only derived from aggregates, never per row
+    daily_marketing = add_rate_metrics(daily_marketing, prefix="daily_")
     
-    # Calculate daily metrics
-    daily_marketing["daily_ctr"] = daily_marketing["clicks"] / daily_marketing["impression"].replace(0, np.nan)
-    daily_marketing["daily_cpc"] = daily_marketing["spend"] / daily_marketing["clicks"].replace(0, np.nan) 
-    daily_marketing["daily_roas"] = daily_marketing["attributed_revenue"] / daily_marketing["spend"].replace(0, np.nan)
+    # Spend anomaly baseline - computed once per data load and kept in attrs (survives the Parquet cache)
+    daily_spend = daily_marketing["spend"].to_numpy()
+    daily_marketing.attrs["spend_mean"] = float(np.nanmean(daily_spend))
+    # Sample std (ddof=1), the same as pandas' Series.std
+    daily_marketing.attrs["spend_std"] = float(np.nanstd(daily_spend, ddof=1))
     
     # Combine business and marketing data
     combined = pd.merge(business, daily_marketing, on="date", how="left")
     
     # Add business context metrics - learned these are important for stakeholders
-    combined["marketing_revenue_share"] = combined["attributed_revenue"] / combined["total_revenue"].replace(0, np.nan)
-    combined["marketing_spend_ratio"] = combined["spend"] / combined["total_revenue"].replace(0, np.nan)
+    combined["marketing_revenue_share"] = safe_divide(
+        combined["attributed_revenue"], combined["total_revenue"]
+    )
+    combined["marketing_spend_ratio"] = safe_divide(combined["spend"], combined["total_revenue"])
     
     return all_marketing, business, combined, daily_marketing
 
+@st.cache_data
+def load_data():
+    """Return the prepared frames, reading them from the Parquet cache when the CSVs are unchanged"""
+    key = source_fingerprint([*MARKETING_FILES.values(), BUSINESS_FILE])
+    key_dir = os.path.join(CACHE_DIR, key)
+    paths = [os.path.join(key_dir, f"{name}.parquet") for name in CACHED_FRAMES]
+    if all(os.path.exists(path) for path in paths):
+        try:
+            return tuple(pd.read_parquet(path, engine="pyarrow") for path in paths)
+        except (OSError, pa.ArrowInvalid):
+            # A damaged cache file is rebuilt and overwritten below instead of failing every start
+            pass
+    
+    frames = prepare_data()
+    try:
+        os.makedirs(key_dir, exist_ok=True)
+        for frame, path in zip(frames, paths):
+            # Write to a temporary file and rename it into place, so no reader ever sees a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=key_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                frame.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        # Keys from older CSVs or cache versions can never match again, so drop their directories
+        for entry in os.listdir(CACHE_DIR):
+            stale = os.path.join(CACHE_DIR, entry)
+            if entry != key and os.path.isdir(stale):
+                shutil.rmtree(stale, ignore_errors=True)
+    except OSError:
+        # Read-only deployments still work, they just rebuild on every cold start
+        pass
+    return frames
+
+@st.cache_resource
+def get_figure(name, figsize):
+    """Figure, axes and draw lock for one chart, built once and redrawn on every rerun"""
+    fig = Figure(figsize=figsize)
+    return fig, fig.add_subplot(), threading.Lock()
+
+@st.cache_data
+def marketing_rollup(key, start_date, end_date, channels):
+    """Volume totals per channel or campaign for one filter selection, cached across reruns"""
+    in_range = date_slice(all_marketing, start_date, end_date)
+    selected = in_range[in_range["channel"].isin(channels)]
+    return rollup(selected, key)
+
 # -------------------------
 # Main App
 # -------------------------
@@ -71,10 +253,6 @@ def load_data():
 # Load data
 all_marketing, business, combined, daily_marketing = load_data()
 
-# Convert dates to datetime for filtering
-combined["date"] = pd.to_datetime(combined["date"], errors="coerce")
-combined = combined.dropna(subset=["date"])
-
 # Page configuration
 st.set_page_config(page_title="Marketing Intelligence Dashboard", layout="wide")
 st.title("📊 Marketing Intelligence Dashboard")
@@ -94,21 +272,19 @@ date_range = st.sidebar.date_input(
     max_value=combined["date"].max().date()
 )
 
-# Filter data
+# Filter data - combined is sorted by date, so the range is a positional slice
 if len(date_range) == 2:
     start_date, end_date = date_range
-    filtered = combined[
-        (combined["date"] >= pd.to_datetime(start_date)) & 
-        (combined["date"] <= pd.to_datetime(end_date))
-    ]
+    filtered = date_slice(combined, start_date, end_date)
 else:
+    start_date, end_date = combined["date"].min().date(), combined["date"].max().date()
     filtered = combined
 
 # Channel filter for detailed analysis
 selected_channels = st.sidebar.multiselect(
     "Select Channels",
-    options=all_marketing["channel"].unique(),
-    default=all_marketing["channel"].unique()
+    options=list(all_marketing["channel"].cat.categories),
+    default=list(all_marketing["channel"].cat.categories)
 )
 
 # -------------------------
@@ -140,34 +316,37 @@ if total_business_revenue > 0:
 
 st.header("📈 Performance Over Time")
 
+trend_cols = ["spend", "total_revenue", "daily_roas"]
+if (end_date - start_date).days > TREND_RESAMPLE_DAYS:
+    trend = filtered.set_index("date")[trend_cols].resample("W").mean().reset_index()
+else:
+    trend = filtered
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Spend vs Revenue Trends")
-    # Using matplotlib for more control - learned this gives better customization
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(filtered["date"], filtered["spend"], label="Marketing Spend", color="#1f77b4", linewidth=2)
-    ax.plot(filtered["date"], filtered["total_revenue"], label="Business Revenue", color="#ff7f0e", linewidth=2)
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Amount ($)")
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Vega-Lite charts render in the browser, so reruns skip building and rasterizing a matplotlib figure
+    spend_revenue = trend.set_index("date")[["spend", "total_revenue"]].rename(
+        columns={"spend": "Marketing Spend", "total_revenue": "Business Revenue"}
+    )
+    st.line_chart(spend_revenue, x_label="Date", y_label="Amount ($)", color=["#1f77b4", "#ff7f0e"])
 
 with col2:
     st.subheader("ROAS Trend")
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(filtered["date"], filtered["daily_roas"], label="Daily ROAS", color="#2ca02c", linewidth=2)
-    ax.axhline(y=1, color="red", linestyle="--", alpha=0.7, label="Break-even Line")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("ROAS")
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Only the two plotted columns are embedded in the chart spec; the shared color scale gives the legend
+    legend = alt.Color("series:N", title=None,
+                       scale=alt.Scale(domain=["Daily ROAS", "Break-even Line"], range=["#2ca02c", "red"]))
+    roas_line = alt.Chart(trend[["date", "daily_roas"]]).mark_line(strokeWidth=2).transform_calculate(
+        series="'Daily ROAS'"
+    ).encode(
+        x=alt.X("date:T", title="Date"),
+        y=alt.Y("daily_roas:Q", title="ROAS"),
+        color=legend
+    )
+    break_even_line = pd.DataFrame({"roas": [1], "series": ["Break-even Line"]})
+    break_even = alt.Chart(break_even_line).mark_rule(strokeDash=[6, 4]).encode(y="roas:Q", color=legend)
+    st.altair_chart(roas_line + break_even)
 
 # -------------------------
 # Channel Performance Analysis
@@ -175,65 +354,61 @@ with col2:
 
 st.header("📱 Channel Performance Breakdown")
 
-# Filter marketing data by selected channels
-filtered_marketing = all_marketing[all_marketing["channel"].isin(selected_channels)]
-
 # Channel summary statistics
-channel_stats = filtered_marketing.groupby("channel").agg({
-    "impression": "sum",
-    "clicks": "sum",
-    "spend": "sum", 
-    "attributed_revenue": "sum"
-}).reset_index()
+channel_stats = marketing_rollup("channel", start_date, end_date, tuple(selected_channels))
 
 channel_stats["channel_ctr"] = channel_stats["clicks"] / channel_stats["impression"]
 channel_stats["channel_cpc"] = channel_stats["spend"] / channel_stats["clicks"] 
 channel_stats["channel_roas"] = channel_stats["attributed_revenue"] / channel_stats["spend"]
 
+# Best and worst channels by ROAS, shared by the insights and recommendations sections
+channel_roas = channel_stats["channel_roas"].to_numpy()
+best_channel = channel_stats.iloc[int(np.nanargmax(channel_roas))]
+worst_channel = channel_stats.iloc[int(np.nanargmin(channel_roas))]
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Investment by Channel")
-    fig, ax = plt.subplots(figsize=(8, 6))
-    bars = ax.bar(channel_stats["channel"], channel_stats["spend"], color=["#1f77b4", "#ff7f0e", "#2ca02c"])
-    ax.set_ylabel("Spend ($)")
-    ax.set_title("Marketing Investment by Channel")
-    # Add value labels on bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'${height:,.0f}', ha='center', va='bottom')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
+    fig, ax, draw_lock = get_figure("channel_spend", (8, 6))
+    with draw_lock:
+        ax.clear()
+        bars = ax.bar(channel_stats["channel"], channel_stats["spend"], color=["#1f77b4", "#ff7f0e", "#2ca02c"])
+        ax.set_ylabel("Spend ($)")
+        ax.set_title("Marketing Investment by Channel")
+        # Add value labels on bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    f'${height:,.0f}', ha='center', va='bottom')
+        ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
+        st.pyplot(fig)
 
 with col2:
     st.subheader("ROAS by Channel")
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax, draw_lock = get_figure("channel_roas", (8, 6))
     colors = ["#2ca02c" if roas > 1 else "#d62728" for roas in channel_stats["channel_roas"]]
-    bars = ax.bar(channel_stats["channel"], channel_stats["channel_roas"], color=colors)
-    ax.axhline(y=1, color="black", linestyle="--", alpha=0.7, label="Break-even")
-    ax.set_ylabel("ROAS")
-    ax.set_title("Return on Ad Spend by Channel")
-    ax.legend()
-    # Add value labels
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'{height:.2f}', ha='center', va='bottom')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig)
+    with draw_lock:
+        ax.clear()
+        bars = ax.bar(channel_stats["channel"], channel_stats["channel_roas"], color=colors)
+        ax.axhline(y=1, color="black", linestyle="--", alpha=0.7, label="Break-even")
+        ax.set_ylabel("ROAS")
+        ax.set_title("Return on Ad Spend by Channel")
+        ax.legend()
+        # Add value labels
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    f'{height:.2f}', ha='center', va='bottom')
+        ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
+        st.pyplot(fig)
 
 # Channel performance table
 st.subheader("Channel Performance Summary")
 display_cols = ["channel", "spend", "attributed_revenue", "channel_roas", "channel_ctr", "channel_cpc"]
-formatted_stats = channel_stats[display_cols].copy()
-formatted_stats["spend"] = formatted_stats["spend"].apply(lambda x: f"${x:,.0f}")
-formatted_stats["attributed_revenue"] = formatted_stats["attributed_revenue"].apply(lambda x: f"${x:,.0f}")
-formatted_stats["channel_roas"] = formatted_stats["channel_roas"].apply(lambda x: f"{x:.2f}")
-formatted_stats["channel_ctr"] = formatted_stats["channel_ctr"].apply(lambda x: f"{x:.2%}")
-formatted_stats["channel_cpc"] = formatted_stats["channel_cpc"].apply(lambda x: f"${x:.2f}")
+formatted_stats = channel_stats[display_cols].style.format(CHANNEL_TABLE_FORMAT)
 
 st.dataframe(formatted_stats, use_container_width=True)
 
@@ -244,12 +419,7 @@ st.dataframe(formatted_stats, use_container_width=True)
 st.header("🎯 Campaign Performance Analysis")
 
 # Campaign-level aggregation
-campaign_stats = filtered_marketing.groupby("campaign").agg({
-    "spend": "sum",
-    "attributed_revenue": "sum", 
-    "clicks": "sum",
-    "impression": "sum"
-}).reset_index()
+campaign_stats = marketing_rollup("campaign", start_date, end_date, tuple(selected_channels))
 
 campaign_stats["campaign_roas"] = campaign_stats["attributed_revenue"] / campaign_stats["spend"]
 campaign_stats["campaign_ctr"] = campaign_stats["clicks"] / campaign_stats["impression"]
@@ -260,13 +430,11 @@ with col1:
     st.subheader("🏆 Top Campaigns by ROAS")
     # Filter campaigns with meaningful spend to avoid outliers
     significant_campaigns = campaign_stats[campaign_stats["spend"] >= 100]
+    # nlargest already selects the top rows without sorting the whole campaign table
     top_roas = significant_campaigns.nlargest(10, "campaign_roas")
     
     display_cols = ["campaign", "spend", "attributed_revenue", "campaign_roas"]
-    top_roas_display = top_roas[display_cols].copy()
-    top_roas_display["spend"] = top_roas_display["spend"].apply(lambda x: f"${x:,.0f}")
-    top_roas_display["attributed_revenue"] = top_roas_display["attributed_revenue"].apply(lambda x: f"${x:,.0f}")
-    top_roas_display["campaign_roas"] = top_roas_display["campaign_roas"].apply(lambda x: f"{x:.2f}")
+    top_roas_display = top_roas[display_cols].style.format(CAMPAIGN_TABLE_FORMAT)
     
     st.dataframe(top_roas_display, use_container_width=True)
 
@@ -274,10 +442,7 @@ with col2:
     st.subheader("💰 Top Campaigns by Investment")
     top_spend = campaign_stats.nlargest(10, "spend")
     
-    top_spend_display = top_spend[display_cols].copy()
-    top_spend_display["spend"] = top_spend_display["spend"].apply(lambda x: f"${x:,.0f}")
-    top_spend_display["attributed_revenue"] = top_spend_display["attributed_revenue"].apply(lambda x: f"${x:,.0f}")
-    top_spend_display["campaign_roas"] = top_spend_display["campaign_roas"].apply(lambda x: f"{x:.2f}")
+    top_spend_display = top_spend[display_cols].style.format(CAMPAIGN_TABLE_FORMAT)
     
     st.dataframe(top_spend_display, use_container_width=True)
 
@@ -293,10 +458,6 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("📊 Performance Insights")
     
-    # Best and worst performing channels
-    best_channel = channel_stats.loc[channel_stats["channel_roas"].idxmax()]
-    worst_channel = channel_stats.loc[channel_stats["channel_roas"].idxmin()]
-    
     st.success(f"🏆 **Top Performer**: {best_channel['channel']} (ROAS: {best_channel['channel_roas']:.2f})")
     st.error(f"⚠️ **Needs Attention**: {worst_channel['channel']} (ROAS: {worst_channel['channel_roas']:.2f})")
     
@@ -322,9 +483,9 @@ with col2:
         st.warning(f"Found {len(underperforming)} high-spend campaigns with ROAS < 0.8")
         
         # Show top 5 for review
-        review_campaigns = underperforming.head(5)[["campaign", "spend", "campaign_roas"]]
-        review_campaigns["spend"] = review_campaigns["spend"].apply(lambda x: f"${x:,.0f}")
-        review_campaigns["campaign_roas"] = review_campaigns["campaign_roas"].apply(lambda x: f"{x:.2f}")
+        review_campaigns = underperforming.head(5)[["campaign", "spend", "campaign_roas"]].style.format(
+            {"spend": "${:,.0f}", "campaign_roas": "{:.2f}"}
+        )
         
         st.dataframe(review_campaigns, use_container_width=True)
         
@@ -340,24 +501,22 @@ with col2:
 st.header("🚨 Anomaly Detection")
 
 # Statistical anomaly detection for spend spikes - AI helped implement this approach
-spend_mean = daily_marketing["spend"].mean()
-spend_std = daily_marketing["spend"].std()
+spend_mean = daily_marketing.attrs["spend_mean"]
+spend_std = daily_marketing.attrs["spend_std"]
 upper_threshold = spend_mean + 2.5 * spend_std
 lower_threshold = max(0, spend_mean - 2.5 * spend_std)
 
-anomalies = daily_marketing[
-    (daily_marketing["spend"] > upper_threshold) | 
-    (daily_marketing["spend"] < lower_threshold)
-].copy()
+daily_spend = daily_marketing["spend"].to_numpy()
+anomalies = daily_marketing[(daily_spend > upper_threshold) | (daily_spend < lower_threshold)]
 
 if len(anomalies) > 0:
     st.warning(f"🔍 Detected {len(anomalies)} spending anomalies using statistical thresholds")
     
     # Show recent anomalies
     recent_anomalies = anomalies.sort_values("date", ascending=False).head(5)
-    anomaly_display = recent_anomalies[["date", "spend", "daily_roas"]].copy()
-    anomaly_display["spend"] = anomaly_display["spend"].apply(lambda x: f"${x:,.0f}")
-    anomaly_display["daily_roas"] = anomaly_display["daily_roas"].apply(lambda x: f"{x:.2f}" if not pd.isna(x) else "N/A")
+    anomaly_display = recent_anomalies[["date", "spend", "daily_roas"]].style.format(
+        {"date": "{:%Y-%m-%d}", "spend": "${:,.0f}", "daily_roas": "{:.2f}"}, na_rep="N/A"
+    )
     
     st.dataframe(anomaly_display, use_container_width=True)
 else:
@@ -372,13 +531,11 @@ st.header("💡 Strategic Recommendations")
 recommendations = []
 
 # Channel-based recommendations
-best_roas_channel = channel_stats.loc[channel_stats["channel_roas"].idxmax()]
-if best_roas_channel["channel_roas"] > 1.5:
-    recommendations.append(f"🔥 **Scale Up**: Increase budget for {best_roas_channel['channel']} (ROAS: {best_roas_channel['channel_roas']:.2f})")
+if best_channel["channel_roas"] > 1.5:
+    recommendations.append(f"🔥 **Scale Up**: Increase budget for {best_channel['channel']} (ROAS: {best_channel['channel_roas']:.2f})")
 
-worst_roas_channel = channel_stats.loc[channel_stats["channel_roas"].idxmin()]  
-if worst_roas_channel["channel_roas"] < 0.8:
-    recommendations.append(f"⚠️ **Optimize**: Review {worst_roas_channel['channel']} strategy (ROAS: {worst_roas_channel['channel_roas']:.2f})")
+if worst_channel["channel_roas"] < 0.8:
+    recommendations.append(f"⚠️ **Optimize**: Review {worst_channel['channel']} strategy (ROAS: {worst_channel['channel_roas']:.2f})")
 
 # Overall performance recommendations
 if avg_roas < 1.2:
@@ -1,11 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import matplotlib
+matplotlib.use("Agg")  # non-interactive: plots are written to out/ instead of opened in windows
 import matplotlib.pyplot as plt
 
 # -------------------------
 # Helper: clean column names
 # -------------------------
 def clean_columns(df):
-    return df.rename(columns=lambda x: x.strip().lower().replace(" ", "_"))
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_", regex=False)
+    return df
+
+# -------------------------
+# Helper: cpc / ctr / roas in one NumPy pass (NaN where the denominator is 0)
+# -------------------------
+def add_metrics(df):
+    s, c, i, r = (df[k].to_numpy(dtype=np.float64) for k in ("spend", "clicks", "impression", "attributed_revenue"))
+    df["cpc"] = np.divide(s, c, out=np.full_like(s, np.nan), where=c != 0)
+    df["ctr"] = np.divide(c, i, out=np.full_like(c, np.nan), where=i != 0)
+    df["roas"] = np.divide(r, s, out=np.full_like(r, np.nan), where=s != 0)
+    return df
+
+# -------------------------
+# Helper: write the current figure to out/plot_<name>.png and free it
+# -------------------------
+OUT_DIR = Path("out")
+
+def save_plot(name):
+    plt.savefig(OUT_DIR / f"plot_{name}.png", dpi=100)
+    plt.close()
 
 # -------------------------
 # Load Marketing Data (all channels)
@@ -16,39 +44,93 @@ files = {
     "TikTok": "data/TikTok.csv"
 }
 
-dfs = []
-for channel, filepath in files.items():
-    temp = pd.read_csv(filepath)
-    temp = clean_columns(temp)         # standardize columns
-    temp["channel"] = channel          # add channel column
-    dfs.append(temp)
-
-# Merge all channels into one DataFrame
-all_data = pd.concat(dfs, ignore_index=True)
+# Arrow's multithreaded C++ parser; `date` is parsed once at read time as ISO %Y-%m-%d into date32
+# (the same format in every source file), so nothing downstream handles date strings
+read_options = pacsv.ReadOptions(use_threads=True)
+convert_options = pacsv.ConvertOptions(column_types={"date": pa.date32()})
+
+# Volume columns parsed straight into 32-bit types: counts fit in int32 (kept signed so the
+# negative-value check below still means something) and float32 is ample for spend/revenue
+marketing_convert_options = pacsv.ConvertOptions(column_types={
+    "date": pa.date32(),
+    "impression": pa.int32(),
+    "clicks": pa.int32(),
+    "spend": pa.float32(),
+    "attributed revenue": pa.float32(),
+})
+
+# Every channel column shares this dictionary, so concatenation never has to unify categories
+channel_names = pa.array(list(files))
+
+def read_channel(code, filepath):
+    table = pacsv.read_csv(filepath, read_options=read_options, convert_options=marketing_convert_options)
+    codes = pa.array(np.full(table.num_rows, code, dtype=np.int8))
+    channel_col = pa.DictionaryArray.from_arrays(codes, channel_names)
+    return table.append_column("channel", channel_col)   # add channel column
+
+# Additive columns summed in every summary
+SUM_COLS = ["impression", "clicks", "spend", "attributed_revenue"]
+
+def load_marketing():
+    # Parsing releases the GIL, so the files are read concurrently; map() keeps them in files order
+    with ThreadPoolExecutor(max_workers=len(files)) as executor:
+        tables = list(executor.map(read_channel, range(len(files)), files.values()))
+
+    # Merge all channels into one table (zero-copy) and convert to pandas once
+    df = clean_columns(pa.concat_tables(tables).to_pandas(date_as_object=False))
+
+    # Group keys as categoricals (channel is already dictionary-encoded), so groupbys hash integer codes
+    df["campaign"] = df["campaign"].astype("category")
+    return df
+
+# Parsed frame cached as Parquet (keeps the 32-bit, categorical and datetime dtypes);
+# rebuilt whenever any source CSV is newer than the cache file.
+# Bump when load_marketing() output changes so stale caches are not reused
+ALL_DATA_CACHE_VERSION = 1
+ALL_DATA_CACHE = Path(f"cache/all_data.v{ALL_DATA_CACHE_VERSION}.parquet")
+
+if ALL_DATA_CACHE.exists() and ALL_DATA_CACHE.stat().st_mtime > max(Path(f).stat().st_mtime for f in files.values()):
+    all_data = pd.read_parquet(ALL_DATA_CACHE)
+else:
+    all_data = load_marketing()
+    ALL_DATA_CACHE.parent.mkdir(exist_ok=True)
+    all_data.to_parquet(ALL_DATA_CACHE, compression="snappy", index=False)
+    # Older versions can never be read again
+    for stale in ALL_DATA_CACHE.parent.glob("all_data*.parquet"):
+        if stale != ALL_DATA_CACHE:
+            stale.unlink()
 
-# Add metrics
-all_data["cpc"] = all_data["spend"] / all_data["clicks"]
-all_data["ctr"] = all_data["clicks"] / all_data["impression"]
-all_data["roas"] = all_data["attributed_revenue"] / all_data["spend"]
+# cpc / ctr / roas are only ever read from the summaries, so they are not materialised per row here
 
 print("\n=== Combined Marketing Data ===")
 print(all_data.head())
 
 # -------------------------
-# Campaign Summary
+# Summary cube: one pass over all rows at channel x campaign x date grain,
+# every summary below is a cheap rollup of this much smaller table
 # -------------------------
-campaign_summary = (
-    all_data.groupby("campaign", as_index=False)
-      .agg({
-          "impression": "sum",
-          "clicks": "sum",
-          "spend": "sum",
-          "attributed_revenue": "sum"
-      })
+CUBE_KEYS = ["channel", "campaign", "date"]
+
+# Aggregated by Arrow's C++ hash-aggregation engine (Acero) over just the key and volume columns;
+# use_threads=False keeps the group order deterministic. Sums come back as int64/float64
+cube = (
+    pa.Table.from_pandas(all_data[CUBE_KEYS + SUM_COLS], preserve_index=False)
+    .group_by(CUBE_KEYS, use_threads=False)
+    .aggregate([(col, "sum") for col in SUM_COLS])
+    .to_pandas(date_as_object=False)
+    .rename(columns={f"{col}_sum": col for col in SUM_COLS})
+    .set_index(CUBE_KEYS)
 )
-campaign_summary["cpc"] = campaign_summary["spend"] / campaign_summary["clicks"]
-campaign_summary["ctr"] = campaign_summary["clicks"] / campaign_summary["impression"]
-campaign_summary["roas"] = campaign_summary["attributed_revenue"] / campaign_summary["spend"]
+
+# Roll the cube up to one key: unsorted groups in first-appearance order, no unobserved categories
+def summarize(level):
+    summary = cube.groupby(level=level, sort=False, observed=True)[SUM_COLS].sum().reset_index()
+    return add_metrics(summary)
+
+# -------------------------
+# Campaign Summary
+# -------------------------
+campaign_summary = summarize("campaign")
 
 print("\n=== Campaign Summary ===")
 print(campaign_summary.head())
@@ -56,18 +138,7 @@ print(campaign_summary.head())
 # -------------------------
 # Daily Summary
 # -------------------------
-daily_summary = (
-    all_data.groupby("date", as_index=False)
-      .agg({
-          "impression": "sum",
-          "clicks": "sum",
-          "spend": "sum",
-          "attributed_revenue": "sum"
-      })
-)
-daily_summary["cpc"] = daily_summary["spend"] / daily_summary["clicks"]
-daily_summary["ctr"] = daily_summary["clicks"] / daily_summary["impression"]
-daily_summary["roas"] = daily_summary["attributed_revenue"] / daily_summary["spend"]
+daily_summary = summarize("date")
 
 print("\n=== Daily Summary ===")
 print(daily_summary.head())
@@ -75,18 +146,7 @@ print(daily_summary.head())
 # -------------------------
 # Channel Summary
 # -------------------------
-channel_summary = (
-    all_data.groupby("channel", as_index=False)
-      .agg({
-          "impression": "sum",
-          "clicks": "sum",
-          "spend": "sum",
-          "attributed_revenue": "sum"
-      })
-)
-channel_summary["cpc"] = channel_summary["spend"] / channel_summary["clicks"]
-channel_summary["ctr"] = channel_summary["clicks"] / channel_summary["impression"]
-channel_summary["roas"] = channel_summary["attributed_revenue"] / channel_summary["spend"]
+channel_summary = summarize("channel")
 
 print("\n=== Channel Summary ===")
 print(channel_summary)
@@ -94,67 +154,83 @@ print(channel_summary)
 # -------------------------
 # Business Integration
 # -------------------------
-business = pd.read_csv("data/Business.csv")
-business = clean_columns(business)
+business = pacsv.read_csv("data/Business.csv", read_options=read_options, convert_options=convert_options)
+business = clean_columns(business.to_pandas(date_as_object=False))
 
 print("\n=== Business Data ===")
 print(business.head())
 
-# Merge daily marketing with business data
-combined = pd.merge(business, daily_summary, on="date", how="left")
+# Join daily marketing onto business data by a sorted date index (one row per date on each side)
+daily_by_date = daily_summary.set_index("date").sort_index()
+business = business.sort_values("date", ignore_index=True)
+combined = business.join(daily_by_date, on="date", how="left", validate="one_to_one")
 
-# Add ratios
-combined["marketing_revenue_pct"] = combined["attributed_revenue"] / combined["total_revenue"]
-combined["marketing_spend_pct"] = combined["spend"] / combined["total_revenue"]
-combined["gross_margin_pct"] = combined["gross_profit"] / combined["total_revenue"]
+# Add ratios in one eval call (evaluated by numexpr when it is installed, plain pandas otherwise)
+combined = combined.eval("""
+marketing_revenue_pct = attributed_revenue / total_revenue
+marketing_spend_pct = spend / total_revenue
+gross_margin_pct = gross_profit / total_revenue
+""")
 
 print("\n=== Business + Marketing Combined ===")
 print(combined[["date", "total_revenue", "spend", "attributed_revenue",
                 "marketing_revenue_pct", "marketing_spend_pct", "gross_margin_pct"]].head())
 
 
+OUT_DIR.mkdir(exist_ok=True)
+
+# Time-series columns pulled out once as arrays and shared by the plots below
+dates = combined["date"].to_numpy()
+spend = combined["spend"].to_numpy()
+revenue = combined["total_revenue"].to_numpy()
+roas = combined["roas"].to_numpy()
+
 # ---- Plot 1: Spend vs Revenue over Time ----
 plt.figure(figsize=(12,5))
 
-plt.plot(combined["date"], combined["spend"], label="Marketing Spend", color="red")
-plt.plot(combined["date"], combined["total_revenue"], label="Total Revenue", color="blue")
+plt.plot(dates, spend, label="Marketing Spend", color="red")
+plt.plot(dates, revenue, label="Total Revenue", color="blue")
 
 plt.xlabel("Date")
 plt.ylabel("Amount ($)")
 plt.title("Spend vs Revenue Over Time")
 plt.legend()
-plt.xticks(rotation=45)
+plt.gcf().autofmt_xdate()  # datetime x-axis: rotate and right-align the date tick labels
 plt.tight_layout()
-plt.show()
+save_plot("spend_vs_revenue")
 
 # ---- Plot 2: ROAS over Time ----
 plt.figure(figsize=(12,5))
 
-plt.plot(combined["date"], combined["roas"], label="ROAS", color="green")
+plt.plot(dates, roas, label="ROAS", color="green")
 
 plt.axhline(y=1, color="gray", linestyle="--", linewidth=1)  # breakeven line
 plt.xlabel("Date")
 plt.ylabel("ROAS (Revenue ÷ Spend)")
 plt.title("ROAS (Return on Ad Spend) Over Time")
 plt.legend()
-plt.xticks(rotation=45)
+plt.gcf().autofmt_xdate()
 plt.tight_layout()
-plt.show()
+save_plot("roas_over_time")
 
 # -------------------------
 # Channel Breakdown: Spend vs Revenue
 # -------------------------
 plt.figure(figsize=(10,6))
 
-plt.bar(channel_summary["channel"], channel_summary["spend"], label="Spend", color="red", alpha=0.6)
-plt.bar(channel_summary["channel"], channel_summary["attributed_revenue"], label="Revenue", color="blue", alpha=0.6)
+# Side-by-side bars per channel rather than two overlapping translucent layers
+x = np.arange(len(channel_summary))
+width = 0.4
+plt.bar(x - width / 2, channel_summary["spend"], width, label="Spend", color="red")
+plt.bar(x + width / 2, channel_summary["attributed_revenue"], width, label="Revenue", color="blue")
+plt.xticks(x, channel_summary["channel"])
 
 plt.xlabel("Channel")
 plt.ylabel("Amount ($)")
 plt.title("Spend vs Revenue by Channel")
 plt.legend()
 plt.tight_layout()
-plt.show()
+save_plot("channel_spend_vs_revenue")
 
 # -------------------------
 # Channel Breakdown: ROAS
@@ -168,12 +244,12 @@ plt.xlabel("Channel")
 plt.ylabel("ROAS")
 plt.title("ROAS by Channel")
 plt.tight_layout()
-plt.show()
+save_plot("channel_roas")
 
 # -------------------------
 # Campaign Leaderboard (Top 10 by ROAS)
 # -------------------------
-top_campaigns = campaign_summary.sort_values("roas", ascending=False).head(10)
+top_campaigns = campaign_summary.nlargest(10, "roas")
 
 plt.figure(figsize=(12,6))
 plt.barh(top_campaigns["campaign"], top_campaigns["roas"], color="green")
@@ -182,12 +258,12 @@ plt.xlabel("ROAS")
 plt.title("Top 10 Campaigns by ROAS")
 plt.gca().invert_yaxis()  # highest at the top
 plt.tight_layout()
-plt.show()
+save_plot("top_campaigns_roas")
 
 # -------------------------
 # Campaign Leaderboard (Top 10 by Spend)
 # -------------------------
-biggest_campaigns = campaign_summary.sort_values("spend", ascending=False).head(10)
+biggest_campaigns = campaign_summary.nlargest(10, "spend")
 
 plt.figure(figsize=(12,6))
 plt.barh(biggest_campaigns["campaign"], biggest_campaigns["spend"], color="red")
@@ -195,7 +271,7 @@ plt.xlabel("Spend ($)")
 plt.title("Top 10 Campaigns by Spend")
 plt.gca().invert_yaxis()
 plt.tight_layout()
-plt.show()
+save_plot("top_campaigns_spend")
 
 
 
@@ -212,20 +288,26 @@ missing_counts = all_data.isnull().sum()
 print("\nMissing values per column:")
 print(missing_counts)
 
+# One float32 copy of the volume columns: the sign and zero checks below are column reductions over it
+# (float32 keeps every < 0 and == 0 comparison exact for these counts and amounts)
+qc = all_data[SUM_COLS].to_numpy(dtype=np.float32)
+qc_negatives = (qc < 0).sum(axis=0)
+qc_zeros = (qc == 0).sum(axis=0)
+
 # 2. Check for negative values (shouldn't exist in spend, clicks, revenue)
-for col in ["impression", "clicks", "spend", "attributed_revenue"]:
-    negatives = (all_data[col] < 0).sum()
+for col, negatives in zip(SUM_COLS, qc_negatives):
     if negatives > 0:
         print(f"⚠️ Warning: {negatives} negative values found in '{col}'")
 
 # 3. Division by zero risks
-zero_clicks = (all_data["clicks"] == 0).sum()
-zero_spend = (all_data["spend"] == 0).sum()
+zero_clicks = qc_zeros[SUM_COLS.index("clicks")]
+zero_spend = qc_zeros[SUM_COLS.index("spend")]
 print(f"\nRows with zero clicks (CPC risk): {zero_clicks}")
 print(f"Rows with zero spend (ROAS risk): {zero_spend}")
 
 # 4. Sanity check totals: marketing spend vs channel summary sum
-total_spend = all_data["spend"].sum()
+# float32 columns are totalled in float64 so they agree with the 64-bit summary sums
+total_spend = all_data["spend"].to_numpy().sum(dtype=np.float64)
 channel_spend_sum = channel_summary["spend"].sum()
 print(f"\nTotal spend (all_data): {total_spend:.2f}")
 print(f"Channel summary spend sum: {channel_spend_sum:.2f}")
@@ -234,7 +316,7 @@ if abs(total_spend - channel_spend_sum) > 1e-6:
 
 # 5. Compare marketing revenue vs business revenue
 if "total_revenue" in combined.columns:
-    total_attr_rev = all_data["attributed_revenue"].sum()
+    total_attr_rev = all_data["attributed_revenue"].to_numpy().sum(dtype=np.float64)
     total_bus_rev = combined["total_revenue"].sum()
     print(f"\nTotal attributed revenue (marketing): {total_attr_rev:.2f}")
     print(f"Total revenue (business): {total_bus_rev:.2f}")
@@ -253,11 +335,13 @@ if not low_roas.empty:
     print(low_roas[["campaign", "spend", "attributed_revenue", "roas"]].head(10))
 
 # 2. High spend spikes (daily spend > mean + 3*std)
-spend_mean = daily_summary["spend"].mean()
-spend_std = daily_summary["spend"].std()
+# Stats and mask straight off the ndarray; ddof=1 and NaN-skipping match Series.mean()/std()
+daily_spend = daily_summary["spend"].to_numpy()
+spend_mean = np.nanmean(daily_spend)
+spend_std = np.nanstd(daily_spend, ddof=1)
 spike_threshold = spend_mean + 3 * spend_std
 
-spikes = daily_summary[daily_summary["spend"] > spike_threshold]
+spikes = daily_summary.iloc[daily_spend > spike_threshold]
 if not spikes.empty:
     print(f"\n⚠️ Detected {len(spikes)} spend spike(s):")
     print(spikes[["date", "spend", "attributed_revenue", "roas"]].head(10))
@@ -270,19 +354,19 @@ print("\n=== RECOMMENDATIONS ===")
 recommendations = []
 
 # 1. Flag campaigns with low ROAS
-for _, row in low_roas.iterrows():
-    recommendations.append(
-        f"Pause or review campaign '{row['campaign']}' — ROAS = {row['roas']:.2f}, Spend = ${row['spend']:.0f}"
-    )
+recommendations.extend(
+    f"Pause or review campaign '{c}' — ROAS = {r:.2f}, Spend = ${sp:.0f}"
+    for c, r, sp in zip(low_roas["campaign"].to_numpy(), low_roas["roas"].to_numpy(), low_roas["spend"].to_numpy())
+)
 
 # 2. Flag spend spikes
-for _, row in spikes.iterrows():
-    recommendations.append(
-        f"Check spend spike on {row['date'].date()} — Spend = ${row['spend']:.0f}, ROAS = {row['roas']:.2f}"
-    )
+recommendations.extend(
+    f"Check spend spike on {d} — Spend = ${sp:.0f}, ROAS = {r:.2f}"
+    for d, sp, r in zip(spikes["date"].dt.date.to_numpy(), spikes["spend"].to_numpy(), spikes["roas"].to_numpy())
+)
 
 # 3. Highlight best-performing campaign
-best_campaign = campaign_summary.sort_values("roas", ascending=False).head(1)
+best_campaign = campaign_summary.nlargest(1, "roas")
 if not best_campaign.empty:
     row = best_campaign.iloc[0]
     recommendations.append(